@@ -0,0 +1,83 @@
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from celery.signals import worker_process_shutdown
+from django.apps import AppConfig
+from django.conf import settings
+
+from .log_handlers import BufferedFileHandler
+
+
+class ListingsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'listings'
+    log_listener = None
+
+    def ready(self):
+        """Connect signal handlers and start the log queue listener"""
+        from . import signals  # noqa: F401
+
+        if ListingsConfig.log_listener is None:
+            ListingsConfig.start_log_listener(settings.LOG_QUEUE)
+            atexit.register(ListingsConfig.stop_log_listener)
+            # Celery's prefork pool and gunicorn --preload run ready() in the
+            # parent; forked children inherit the queue but not the thread
+            os.register_at_fork(
+                before=ListingsConfig.flush_log_listener,
+                after_in_child=ListingsConfig.restart_log_listener
+            )
+            # Pool children leave through os._exit(), skipping atexit
+            worker_process_shutdown.connect(
+                ListingsConfig.on_worker_process_shutdown, weak=False
+            )
+
+    @classmethod
+    def start_log_listener(cls, log_queue):
+        """Drain ``log_queue`` into LOG_FILE on a background thread"""
+        listener = QueueListener(
+            log_queue,
+            BufferedFileHandler(settings.LOG_FILE),
+            respect_handler_level=True
+        )
+        listener.start()
+        cls.log_listener = listener
+
+    @classmethod
+    def stop_log_listener(cls):
+        """Stop the listener, writing out any queued records"""
+        if cls.log_listener is not None:
+            cls.log_listener.stop()
+            for handler in cls.log_listener.handlers:
+                handler.close()
+            cls.log_listener = None
+
+    @classmethod
+    def on_worker_process_shutdown(cls, **kwargs):
+        """Write out a Celery pool child's logs before it exits"""
+        cls.stop_log_listener()
+
+    @classmethod
+    def flush_log_listener(cls):
+        """Flush buffered records so a forked child does not write them again"""
+        if cls.log_listener is not None:
+            for handler in cls.log_listener.handlers:
+                handler.flush()
+
+    @classmethod
+    def restart_log_listener(cls):
+        """
+        Give a forked child its own log queue and listener thread.
+
+        The inherited queue may still hold the parent's undrained records,
+        so the child's QueueHandlers are pointed at a fresh queue instead.
+        """
+        if cls.log_listener is None:
+            return
+        log_queue = queue.Queue(-1)
+        for handler in logging.getLogger(cls.name).handlers:
+            if isinstance(handler, QueueHandler):
+                handler.queue = log_queue
+        cls.start_log_listener(log_queue)
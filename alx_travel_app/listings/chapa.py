@@ -0,0 +1,131 @@
+"""
+Chapa payment gateway client shared by the listings views and tasks
+"""
+from django.conf import settings
+from datetime import datetime, timedelta
+import httpx
+import orjson
+import pybreaker
+import redis
+
+# Resolved once at import instead of through LazySettings on every request
+CHAPA_INITIALIZE_URL = f"{settings.CHAPA_BASE_URL}/transaction/initialize"
+CHAPA_VERIFY_URL = f"{settings.CHAPA_BASE_URL}/transaction/verify/{{}}"
+CHAPA_CALLBACK_URL = f"{settings.CHAPA_CALLBACK_URL}?reference={{}}"
+
+# Keep-alive HTTP/2 client shared by every Chapa API call in this process;
+# concurrent calls are multiplexed as streams over one connection. The
+# transport only retries failed connection attempts.
+chapa_client = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=50
+        )
+    ),
+    timeout=30.0,
+    headers={"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
+)
+
+# Errors raised before a request left this process. Only these are safe to
+# retry for a transaction initialization: after a read timeout or a 5xx,
+# Chapa may already hold the tx_ref and would reject it as a duplicate.
+CHAPA_UNSENT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    pybreaker.CircuitBreakerError
+)
+
+# Seconds the breaker stays open before letting a trial call through
+CHAPA_BREAKER_RESET_TIMEOUT = 10
+
+# Built on first use: CircuitRedisState writes to Redis when constructed,
+# and importing this module must not need Redis (manage.py check, migrate)
+_chapa_breaker = None
+_chapa_breaker_state = None
+
+
+def get_chapa_breaker():
+    """
+    Return the Chapa circuit breaker, creating it on first use.
+    
+    It opens after 5 consecutive failed calls. State lives in Redis so
+    every gunicorn/Celery process trips and recovers together.
+    """
+    global _chapa_breaker, _chapa_breaker_state
+    if _chapa_breaker is None:
+        _chapa_breaker_state = pybreaker.CircuitRedisState(
+            pybreaker.STATE_CLOSED,
+            redis.Redis.from_url(settings.CHAPA_BREAKER_REDIS_URL),
+            namespace='chapa'
+        )
+        _chapa_breaker = pybreaker.CircuitBreaker(
+            fail_max=5,
+            reset_timeout=CHAPA_BREAKER_RESET_TIMEOUT,
+            exclude=[ValueError],
+            state_storage=_chapa_breaker_state
+        )
+    return _chapa_breaker
+
+
+def chapa_is_down():
+    """
+    Return True while the breaker is open and its reset timeout is running.
+    
+    pybreaker only moves an open breaker to half-open when a call goes
+    through it, so the stored state alone would stay 'open' forever for
+    callers that check it and then skip the call.
+    """
+    breaker = get_chapa_breaker()
+    if breaker.current_state != pybreaker.STATE_OPEN:
+        return False
+    # Naive UTC, as CircuitRedisState stores it and before_call compares it
+    opened_at = _chapa_breaker_state.opened_at
+    return opened_at is not None and datetime.utcnow() < (
+        opened_at + timedelta(seconds=breaker.reset_timeout)
+    )
+
+
+def _chapa_request(method, url, **kwargs):
+    """Send one request, raising on 5xx so the breaker counts it as failed"""
+    response = chapa_client.request(method, url, **kwargs)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+
+def chapa_call(method, url, payload=None):
+    """
+    Send a request to Chapa through the shared client and circuit breaker.
+    
+    Args:
+        method (str): HTTP method
+        url (str): Full Chapa API URL
+        payload (dict): Optional JSON body
+    
+    Returns:
+        tuple: ``(status_code, response_data, error)``. ``error`` is the
+            httpx.HTTPError (including 5xx responses), orjson.JSONDecodeError
+            or pybreaker.CircuitBreakerError that stopped the call, in which
+            case the other two items are None.
+    """
+    headers = {}
+    content = None
+    if payload is not None:
+        headers["Content-Type"] = "application/json"
+        content = orjson.dumps(payload)
+
+    try:
+        response = get_chapa_breaker().call(
+            _chapa_request, method, url, content=content, headers=headers
+        )
+        return response.status_code, orjson.loads(response.content), None
+    except (
+        httpx.HTTPError,
+        orjson.JSONDecodeError,
+        pybreaker.CircuitBreakerError
+    ) as exc:
+        return None, None, exc
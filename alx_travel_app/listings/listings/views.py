@@ -7,7 +7,10 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Booking, Listing
 from .serializers import BookingSerializer
-from .tasks import send_booking_confirmation_email
+from .tasks import queue_booking_confirmation_emails
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class BookingViewSet(viewsets.ModelViewSet):
@@ -24,9 +27,10 @@ class BookingViewSet(viewsets.ModelViewSet):
         Filter bookings to show only the current user's bookings.
         """
         user = self.request.user
+        queryset = Booking.objects.select_related('user', 'listing')
         if user.is_staff:
-            return Booking.objects.all()
-        return Booking.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
     
     def perform_create(self, serializer):
         """
@@ -35,18 +39,10 @@ class BookingViewSet(viewsets.ModelViewSet):
         # Save the booking with the current user
         booking = serializer.save(user=self.request.user)
         
-        # Trigger the async email task
-        # Using delay() to run the task asynchronously
-        send_booking_confirmation_email.delay(
-            booking_id=booking.id,
-            user_email=booking.user.email,
-            user_name=booking.user.get_full_name() or booking.user.username,
-            listing_title=booking.listing.title,
-            check_in=str(booking.check_in),
-            check_out=str(booking.check_out)
-        )
+        # Trigger the async email task over a pooled broker producer
+        queue_booking_confirmation_emails([booking.id])
         
-        print(f"📧 Email task queued for booking #{booking.id}")
+        logger.info("Email task queued for booking #%s", booking.id)
     
     def create(self, request, *args, **kwargs):
         """
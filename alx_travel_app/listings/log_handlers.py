@@ -0,0 +1,69 @@
+"""
+Logging handlers for the listings app
+"""
+import atexit
+import logging
+import threading
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that batches writes instead of flushing every record.
+
+    Records are written into a large file buffer which is flushed when it
+    fills up, every ``flush_interval`` seconds, at interpreter exit, and
+    immediately for records at ERROR or above.
+    """
+
+    def __init__(self, filename, mode='a', encoding=None, delay=False,
+                 buffer_size=65536, flush_interval=30):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._flush_timer = None
+        self._stopped = False
+        super().__init__(filename, mode, encoding, delay)
+        self._schedule_flush()
+        atexit.register(self.close)
+
+    def _open(self):
+        """Open the log file with a large write buffer"""
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors
+        )
+
+    def emit(self, record):
+        """Write the record, flushing only for errors"""
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        """Stop the flush timer and close the file"""
+        self._stopped = True
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        super().close()
+
+    def _schedule_flush(self):
+        if self._stopped:
+            return
+        self._flush_timer = threading.Timer(
+            self.flush_interval, self._periodic_flush
+        )
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _periodic_flush(self):
+        self.flush()
+        self._schedule_flush()
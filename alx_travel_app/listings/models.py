@@ -3,11 +3,28 @@ Models for the listings app - Listings, Bookings, and Payments
 """
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+import os
+import time
 import uuid
 
 
+def uuid7():
+    """
+    Generate a time-ordered UUID (RFC 9562 version 7).
+
+    The leading 48 bits are the Unix time in milliseconds, so new rows land
+    at the end of the unique index instead of at random leaf pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80
+    value |= int.from_bytes(os.urandom(10), 'big')
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC variant
+    return uuid.UUID(int=value)
+
+
 class Listing(models.Model):
     """Travel listing model"""
     PROPERTY_TYPES = [
@@ -35,10 +52,48 @@ class Listing(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['available', 'location']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['property_type']),
+            models.Index(fields=['price_per_night']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.location}"
 
+    @staticmethod
+    def cache_key(pk):
+        """Cache key for the listing with the given primary key"""
+        return f"listing:{pk}"
+
+    @classmethod
+    def cached(cls, pk):
+        """Return a listing with title and price loaded, served from cache"""
+        return cache.get_or_set(
+            cls.cache_key(pk),
+            lambda: cls.objects.only('title', 'price_per_night').get(pk=pk),
+            3600
+        )
+
+    @staticmethod
+    def list_cache_version():
+        """
+        Current version of cached listing search results
+
+        A missing (e.g. evicted) version is reseeded from the clock rather
+        than 1, so pages cached under an earlier version never match again.
+        """
+        return cache.get_or_set('listings:version', time.time_ns, None)
+
+    @staticmethod
+    def bump_list_cache_version():
+        """Invalidate every cached listing search result at once"""
+        try:
+            cache.incr('listings:version')
+        except ValueError:
+            cache.set('listings:version', time.time_ns(), None)
+
 
 class Booking(models.Model):
     """Booking model for travel reservations"""
@@ -50,7 +105,7 @@ class Booking(models.Model):
     ]
     
     booking_id = models.UUIDField(
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
         unique=True
     )
@@ -82,6 +137,11 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['listing', 'check_in', 'check_out']),
+            models.Index(fields=['status']),
+        ]
 
     def __str__(self):
         return f"Booking {self.booking_id} - {self.user.email}"
@@ -91,17 +151,33 @@ class Booking(models.Model):
         if self.check_out and self.check_in:
             nights = (self.check_out - self.check_in).days
             if nights > 0:
-                self.total_price = self.listing.price_per_night * nights
+                if Booking.listing.is_cached(self):
+                    listing = self.listing
+                else:
+                    listing = Listing.cached(self.listing_id)
+                self.total_price = listing.price_per_night * nights
                 return self.total_price
         return Decimal('0.00')
 
     def save(self, *args, **kwargs):
-        """Override save to calculate total price"""
-        if not self.total_price or self.total_price == 0:
+        """Override save to calculate total price on creation"""
+        if self._state.adding and (not self.total_price or self.total_price == 0):
             self.calculate_total_price()
         super().save(*args, **kwargs)
 
 
+def generate_payment_reference():
+    """Generate a unique Chapa transaction reference, e.g. TRV-1A2B3C4D5E6F"""
+    return f"TRV-{uuid.uuid4().hex[:12].upper()}"
+
+
+class PaymentManager(models.Manager):
+    """Default Payment manager that leaves out the raw Chapa response"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('raw_response')
+
+
 class Payment(models.Model):
     """Payment model to track Chapa payment transactions"""
     STATUS_CHOICES = [
@@ -113,7 +189,7 @@ class Payment(models.Model):
     ]
     
     payment_id = models.UUIDField(
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
         unique=True
     )
@@ -132,6 +208,7 @@ class Payment(models.Model):
     reference = models.CharField(
         max_length=255,
         unique=True,
+        default=generate_payment_reference,
         help_text="Unique reference for this payment"
     )
     amount = models.DecimalField(
@@ -160,32 +237,56 @@ class Payment(models.Model):
     error_message = models.TextField(blank=True, null=True)
     raw_response = models.JSONField(blank=True, null=True)
 
+    objects = PaymentManager()
+    all_objects = models.Manager()
+
     class Meta:
         ordering = ['-initiated_at']
 
     def __str__(self):
         return f"Payment {self.payment_id} - {self.status}"
 
-    def mark_as_completed(self, transaction_id=None):
-        """Mark payment as completed"""
+    def apply_update(self, **fields):
+        """Set fields on this instance and persist them in a single UPDATE"""
         from django.utils import timezone
-        self.status = 'completed'
+        fields.setdefault('updated_at', timezone.now())
+        for name, value in fields.items():
+            setattr(self, name, value)
+        Payment.objects.filter(pk=self.pk).update(**fields)
+
+    def mark_as_completed(self, transaction_id=None, **fields):
+        """Mark payment as completed, saving any extra fields alongside"""
+        from django.utils import timezone
+        now = timezone.now()
         if transaction_id:
-            self.transaction_id = transaction_id
-        self.completed_at = timezone.now()
-        self.save()
+            fields['transaction_id'] = transaction_id
+        self.apply_update(
+            status='completed',
+            completed_at=now,
+            updated_at=now,
+            **fields
+        )
         
         # Update booking status
-        self.booking.status = 'confirmed'
-        self.booking.save()
+        self._update_booking_status('confirmed', now)
 
-    def mark_as_failed(self, error_message=None):
-        """Mark payment as failed"""
-        self.status = 'failed'
+    def mark_as_failed(self, error_message=None, **fields):
+        """Mark payment as failed, saving any extra fields alongside"""
+        from django.utils import timezone
+        now = timezone.now()
         if error_message:
-            self.error_message = error_message
-        self.save()
+            fields['error_message'] = error_message
+        self.apply_update(status='failed', updated_at=now, **fields)
         
         # Update booking status
-        self.booking.status = 'cancelled'
-        self.booking.save()
+        self._update_booking_status('cancelled', now)
+
+    def _update_booking_status(self, booking_status, now):
+        """Set the booking status with a single-column UPDATE"""
+        Booking.objects.filter(pk=self.booking_id).update(
+            status=booking_status,
+            updated_at=now
+        )
+        if Payment.booking.is_cached(self):
+            self.booking.status = booking_status
+            self.booking.updated_at = now
@@ -0,0 +1,18 @@
+"""
+Pagination classes for the listings app
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class ListingCursorPagination(CursorPagination):
+    """
+    Cursor pagination for listings, newest first.
+
+    Each page seeks from the last created_at seen instead of using OFFSET,
+    so deep pages cost about the same as the first one. DRF builds the
+    cursor from the first ordering field only; listings sharing a
+    created_at are told apart by a small offset, and -id just keeps their
+    order stable.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
@@ -0,0 +1,16 @@
+"""
+Signal handlers for the listings app
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Listing
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_cache(sender, instance, **kwargs):
+    """Drop cached copies of a listing and of listing search results"""
+    cache.delete(Listing.cache_key(instance.pk))
+    Listing.bump_list_cache_version()
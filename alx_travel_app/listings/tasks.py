@@ -2,63 +2,143 @@
 Celery tasks for the listings app
 This module contains asynchronous tasks for sending notifications.
 """
-from celery import shared_task
-from django.core.mail import send_mail
+from celery import current_app, shared_task
+from celery.exceptions import Retry
+from celery.signals import worker_process_shutdown
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from smtplib import SMTPServerDisconnected
+from string import Template
+import logging
+import pybreaker
+
+from .chapa import (
+    CHAPA_BREAKER_RESET_TIMEOUT,
+    CHAPA_CALLBACK_URL,
+    CHAPA_INITIALIZE_URL,
+    CHAPA_UNSENT_ERRORS,
+    chapa_call
+)
+from .models import Booking, Payment
+
+logger = logging.getLogger(__name__)
+
+# Parsed once at import; each task run only substitutes the values
+BOOKING_CONFIRMATION_BODY = Template("""
+Dear $user_name,
+
+Thank you for your booking!
+
+Booking Details:
+----------------
+Booking ID: $booking_id
+Property: $listing_title
+Check-in: $check_in
+Check-out: $check_out
+
+We look forward to hosting you!
+
+Best regards,
+ALX Travel App Team
+        """)
+
+# SMTP connection shared by every email task run in this worker process
+_mail_connection = None
+
+
+def get_mail_connection():
+    """
+    Return the worker's shared mail connection, (re)opening it if needed.
+    
+    Returns:
+        BaseEmailBackend: An open email backend connection
+    """
+    global _mail_connection
+    # Only the SMTP backend exposes ``connection``; it is None once closed
+    if (_mail_connection is None
+            or getattr(_mail_connection, 'connection', True) is None):
+        _mail_connection = get_connection()
+        _mail_connection.open()
+    return _mail_connection
+
+
+@worker_process_shutdown.connect
+def close_mail_connection(**kwargs):
+    """Close the shared mail connection when the worker process exits."""
+    global _mail_connection
+    if _mail_connection is not None:
+        _mail_connection.close()
+        _mail_connection = None
 
 
 @shared_task(bind=True, max_retries=3)
-def send_booking_confirmation_email(self, booking_id, user_email, user_name, 
-                                    listing_title, check_in, check_out):
+def send_booking_confirmation_email(self, booking_id):
     """
     Send a booking confirmation email to the user.
     
     This task runs asynchronously to avoid blocking the request-response cycle.
+    Only the booking's primary key travels through the broker; the details
+    needed for the email are loaded here in a single query.
     
     Args:
-        booking_id (int): The ID of the booking
-        user_email (str): Email address of the user
-        user_name (str): Name of the user
-        listing_title (str): Title of the booked listing
-        check_in (str): Check-in date
-        check_out (str): Check-out date
+        booking_id (int): The primary key of the booking
     
     Returns:
         dict: Success status and message
     """
+    try:
+        booking = Booking.objects.select_related('user', 'listing').only(
+            'booking_id', 'check_in', 'check_out',
+            'user__email', 'user__first_name', 'user__last_name',
+            'user__username', 'listing__title'
+        ).get(pk=booking_id)
+    except Booking.DoesNotExist:
+        logger.warning(
+            "Booking #%s no longer exists, skipping confirmation email",
+            booking_id
+        )
+        return {
+            'status': 'skipped',
+            'message': 'Booking not found',
+            'booking_id': booking_id
+        }
+
+    user_email = booking.user.email
+
     try:
         # Email subject
-        subject = f'Booking Confirmation - {listing_title}'
+        subject = f'Booking Confirmation - {booking.listing.title}'
         
         # Email body
-        message = f"""
-Dear {user_name},
-
-Thank you for your booking!
-
-Booking Details:
-----------------
-Booking ID: {booking_id}
-Property: {listing_title}
-Check-in: {check_in}
-Check-out: {check_out}
-
-We look forward to hosting you!
-
-Best regards,
-ALX Travel App Team
-        """
+        message = BOOKING_CONFIRMATION_BODY.substitute(
+            user_name=booking.user.get_full_name() or booking.user.username,
+            booking_id=booking.booking_id,
+            listing_title=booking.listing.title,
+            check_in=booking.check_in,
+            check_out=booking.check_out
+        )
         
-        # Send email
-        send_mail(
+        # Send email over the worker's pooled SMTP connection
+        email = EmailMessage(
             subject=subject,
-            message=message,
+            body=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_email],
-            fail_silently=False,
+            to=[user_email],
+            connection=get_mail_connection(),
         )
+        try:
+            email.send(fail_silently=False)
+        except SMTPServerDisconnected:
+            # The server dropped the pooled session while it sat idle;
+            # reconnect and resend now rather than waiting for a retry
+            close_mail_connection()
+            email.connection = get_mail_connection()
+            email.send(fail_silently=False)
         
-        print(f"✅ Booking confirmation email sent to {user_email} for booking #{booking_id}")
+        logger.info(
+            "Booking confirmation email sent to %s for booking #%s",
+            user_email, booking_id
+        )
         
         return {
             'status': 'success',
@@ -68,7 +148,187 @@ ALX Travel App Team
         
     except Exception as exc:
         # Retry the task if it fails
-        print(f"❌ Failed to send email for booking #{booking_id}: {str(exc)}")
+        logger.error(
+            "Failed to send email for booking #%s: %s", booking_id, exc
+        )
+        
+        # Drop a possibly broken connection so the retry opens a fresh one
+        close_mail_connection()
         
         # Retry with exponential backoff
         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+
+
+@shared_task(bind=True, max_retries=3)
+def initiate_chapa_payment(self, payment_id, email, first_name, last_name,
+                           phone_number=''):
+    """
+    Initialize a Chapa transaction for a pending payment.
+    
+    The initiate_payment view only creates the Payment row; this task makes
+    the slow call to Chapa and records either the checkout URL or the
+    failure on the payment. Calls that never reached Chapa (connection
+    errors, open breaker) are retried with exponential backoff before the
+    payment is marked as failed; any other error fails it straight away.
+    
+    Args:
+        payment_id (str): The UUID of the pending payment
+        email (str): Customer email sent to Chapa
+        first_name (str): Customer first name
+        last_name (str): Customer last name
+        phone_number (str): Customer phone number
+    
+    Returns:
+        dict: Status of the initialization
+    """
+    try:
+        payment = Payment.objects.select_related('booking__listing').get(
+            payment_id=payment_id
+        )
+    except Payment.DoesNotExist:
+        logger.warning("Payment %s no longer exists, skipping", payment_id)
+        return {
+            'status': 'skipped',
+            'message': 'Payment not found',
+            'payment_id': payment_id
+        }
+
+    if payment.status != 'pending':
+        return {
+            'status': 'skipped',
+            'message': f'Payment is already {payment.status}',
+            'payment_id': payment_id
+        }
+
+    booking = payment.booking
+    reference = payment.reference
+    callback_url = CHAPA_CALLBACK_URL.format(reference)
+
+    payload = {
+        "amount": str(payment.amount),
+        "currency": payment.currency,
+        "email": email,
+        "first_name": first_name,
+        "last_name": last_name,
+        "phone_number": phone_number,
+        "tx_ref": reference,
+        "callback_url": callback_url,
+        "return_url": callback_url,
+        "customization": {
+            "title": f"Booking Payment - {booking.listing.title}",
+            "description": f"Payment for booking {booking.booking_id}"
+        }
+    }
+
+    try:
+        # Make request to Chapa API
+        status_code, response_data, error = chapa_call(
+            'POST', CHAPA_INITIALIZE_URL, payload
+        )
+
+        if error is not None:
+            if isinstance(error, CHAPA_UNSENT_ERRORS):
+                # Never reached Chapa, so the same tx_ref is safe to resend
+                return _retry_chapa_initiation(self, payment, error)
+
+            # Timeout, Chapa 5xx or unreadable response: the transaction may
+            # exist at Chapa, so it is not initialized a second time
+            error_message = f"Payment gateway error: {str(error)}"
+            payment.mark_as_failed(error_message)
+
+            logger.error("Payment initiation error: %s", error)
+
+            return {
+                'status': 'error',
+                'message': error_message,
+                'payment_id': payment_id
+            }
+
+        logger.info("Chapa API Response: %s", response_data)
+
+        if status_code == 200 and response_data.get('status') == 'success':
+            # Update payment with Chapa response
+            payment.apply_update(
+                checkout_url=response_data['data']['checkout_url'],
+                chapa_reference=response_data['data'].get('tx_ref', reference),
+                status='processing',
+                raw_response=response_data
+            )
+
+            return {
+                'status': 'success',
+                'message': 'Payment initiated successfully',
+                'payment_id': payment_id
+            }
+
+        # Payment initiation failed
+        error_message = response_data.get('message', 'Payment initiation failed')
+        payment.mark_as_failed(error_message)
+
+        logger.error("Chapa API Error: %s", response_data)
+
+        return {
+            'status': 'error',
+            'message': error_message,
+            'payment_id': payment_id
+        }
+
+    except Retry:
+        raise
+
+    except Exception as exc:
+        # Unexpected error
+        payment.mark_as_failed(f"Unexpected error: {str(exc)}")
+
+        logger.error("Unexpected payment error: %s", exc)
+
+        return {
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'payment_id': payment_id
+        }
+
+
+def _retry_chapa_initiation(task, payment, error):
+    """Retry an unsent Chapa call, or fail the payment once out of retries"""
+    if task.request.retries >= task.max_retries:
+        error_message = f"Failed to connect to payment gateway: {str(error)}"
+        payment.mark_as_failed(error_message)
+
+        logger.error("Payment initiation error: %s", error)
+
+        return {
+            'status': 'error',
+            'message': error_message,
+            'payment_id': str(payment.payment_id)
+        }
+
+    # Retry with exponential backoff, or once the breaker may close
+    if isinstance(error, pybreaker.CircuitBreakerError):
+        countdown = CHAPA_BREAKER_RESET_TIMEOUT
+    else:
+        countdown = 2 ** task.request.retries
+    raise task.retry(exc=error, countdown=countdown)
+
+
+def queue_booking_confirmation_emails(booking_ids):
+    """
+    Queue booking confirmation emails through one pooled broker producer.
+    
+    Calling ``delay()`` per booking checks a producer out of the pool for
+    every message; publishing a batch over a single producer reuses the
+    same broker connection for all of them.
+    
+    Args:
+        booking_ids (iterable): Primary keys of the bookings to confirm
+    """
+    # Emails go to the non-durable emails queue; a confirmation more than
+    # an hour late is dropped rather than sent
+    with current_app.producer_or_acquire() as producer:
+        for booking_id in booking_ids:
+            send_booking_confirmation_email.apply_async(
+                kwargs={'booking_id': booking_id},
+                queue='emails',
+                expires=3600,
+                producer=producer
+            )
@@ -0,0 +1,206 @@
+"""
+Tests for the listings app
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+import pybreaker
+
+from . import chapa
+from .models import Booking, Listing, Payment
+
+
+class InitiatePaymentTestCase(TestCase):
+    """A guest with one booking, ready to call initiate_payment"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='guest', email='guest@example.com', password='password'
+        )
+        listing = Listing.objects.create(
+            title='Cozy Beach House',
+            description='Beach house with ocean views',
+            property_type='villa',
+            location='Malibu, California',
+            price_per_night=Decimal('250.00')
+        )
+        self.booking = Booking.objects.create(
+            user=self.user,
+            listing=listing,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=12),
+            number_of_guests=2,
+            total_price=Decimal('500.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def initiate(self):
+        with mock.patch('listings.views.initiate_chapa_payment') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('payment-initiate'), {
+                    'booking_id': str(self.booking.booking_id),
+                    'email': 'guest@example.com',
+                    'first_name': 'Alice',
+                    'last_name': 'Johnson'
+                }, format='json')
+        return response, task
+
+
+class InitiatePaymentBreakerTests(InitiatePaymentTestCase):
+    """initiate_payment against an open Chapa circuit breaker"""
+
+    def setUp(self):
+        super().setUp()
+
+        # In-memory breaker in place of the Redis-backed one
+        self.state = pybreaker.CircuitMemoryState(pybreaker.STATE_CLOSED)
+        breaker = pybreaker.CircuitBreaker(
+            reset_timeout=chapa.CHAPA_BREAKER_RESET_TIMEOUT,
+            state_storage=self.state
+        )
+        patcher = mock.patch.multiple(
+            chapa, _chapa_breaker=breaker, _chapa_breaker_state=self.state
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        breaker.open()
+
+    def test_open_breaker_fails_fast_with_503(self):
+        # CircuitRedisState hands back opened_at as a naive UTC datetime
+        self.state.opened_at = datetime.utcnow()
+
+        response, task = self.initiate()
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(
+            response['Retry-After'], str(chapa.CHAPA_BREAKER_RESET_TIMEOUT)
+        )
+        self.assertFalse(Payment.objects.exists())
+        task.delay.assert_not_called()
+
+    def test_breaker_past_reset_timeout_lets_initiation_through(self):
+        self.state.opened_at = datetime.utcnow() - timedelta(
+            seconds=chapa.CHAPA_BREAKER_RESET_TIMEOUT + 1
+        )
+
+        response, task = self.initiate()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        task.delay.assert_called_once()
+
+
+class InitiatePaymentRequeueTests(InitiatePaymentTestCase):
+    """initiate_payment for a booking whose payment is already pending"""
+
+    def setUp(self):
+        super().setUp()
+        self.payment = Payment.objects.create(
+            booking=self.booking, amount=self.booking.total_price
+        )
+        patcher = mock.patch(
+            'listings.views.chapa_is_down', return_value=False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_recent_pending_payment_is_not_queued_again(self):
+        response, task = self.initiate()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        task.delay.assert_not_called()
+
+    def test_stale_pending_payment_is_queued_again(self):
+        Payment.objects.filter(pk=self.payment.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=10)
+        )
+
+        response, task = self.initiate()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        task.delay.assert_called_once()
+        self.payment.refresh_from_db()
+        self.assertGreater(
+            self.payment.updated_at, timezone.now() - timedelta(minutes=1)
+        )
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class ListingListCacheVersionTests(TestCase):
+    """Versioning of cached listing search results"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_the_version(self):
+        version = Listing.list_cache_version()
+        Listing.bump_list_cache_version()
+        self.assertNotEqual(Listing.list_cache_version(), version)
+
+    def test_evicted_version_is_not_reused(self):
+        version = Listing.list_cache_version()
+        cache.delete('listings:version')
+        self.assertGreater(Listing.list_cache_version(), version)
+
+        version = Listing.list_cache_version()
+        cache.delete('listings:version')
+        Listing.bump_list_cache_version()
+        self.assertGreater(Listing.list_cache_version(), version)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class VerifyPaymentReplayTests(TestCase):
+    """verify_payment answering Chapa webhook replays"""
+
+    reference = 'TRV-0123456789AB'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = f"{reverse('payment-verify')}?reference={self.reference}"
+
+    def test_replay_during_verification_does_not_call_chapa(self):
+        cache.add(f'chapa:verified:{self.reference}', '1', 60)
+
+        with mock.patch('listings.views.chapa_call') as chapa_call:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        chapa_call.assert_not_called()
+
+    def test_final_outcome_is_served_from_cache(self):
+        body = {'status': 'failed', 'message': 'Payment verification failed'}
+        cache.set(
+            f'chapa:result:{self.reference}',
+            (body, status.HTTP_400_BAD_REQUEST),
+            300
+        )
+
+        with mock.patch('listings.views.chapa_call') as chapa_call:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), body)
+        chapa_call.assert_not_called()
+
+    def test_claim_is_released_after_verification(self):
+        with mock.patch('listings.views.chapa_call') as chapa_call:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        chapa_call.assert_not_called()
+        self.assertIsNone(cache.get(f'chapa:verified:{self.reference}'))
@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ListingViewSet, BookingViewSet
+from .views import (
+    ListingViewSet,
+    BookingViewSet,
+    initiate_payment,
+    verify_payment,
+    payment_status
+)
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -10,6 +16,13 @@ router.register(r'bookings', BookingViewSet, basename='booking')
 # The API URLs are determined automatically by the router
 urlpatterns = [
     path('', include(router.urls)),
+    path('payments/initiate/', initiate_payment, name='payment-initiate'),
+    path('payments/verify/', verify_payment, name='payment-verify'),
+    path(
+        'payments/status/<uuid:payment_id>/',
+        payment_status,
+        name='payment-status'
+    ),
 ]
 
 # Available endpoints:
@@ -28,6 +41,7 @@ urlpatterns = [
 # Bookings:
 # - GET    /api/bookings/                     - List all bookings
 # - POST   /api/bookings/                     - Create a new booking
+# - POST   /api/bookings/bulk/                - Create many bookings at once
 # - GET    /api/bookings/{id}/                - Retrieve a specific booking
 # - PUT    /api/bookings/{id}/                - Update a booking
 # - PATCH  /api/bookings/{id}/                - Partial update a booking
@@ -37,3 +51,8 @@ urlpatterns = [
 # - GET    /api/bookings/upcoming/            - Get upcoming bookings
 # - POST   /api/bookings/{id}/confirm/        - Confirm a booking (host only)
 # - POST   /api/bookings/{id}/cancel/         - Cancel a booking
+#
+# Payments:
+# - POST   /api/payments/initiate/            - Queue a Chapa payment (202)
+# - GET    /api/payments/verify/              - Verify a payment by reference
+# - GET    /api/payments/status/{payment_id}/ - Poll a payment's status
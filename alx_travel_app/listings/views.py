@@ -6,13 +6,18 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.conf import settings
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.db import transaction
+from django.core.cache import cache
 from django.utils import timezone
-import requests
-import uuid
+from datetime import timedelta
+from functools import partial
+import pybreaker
+import re
 import logging
 
-from .models import Listing, Booking, Payment
+from .models import Listing, Booking, Payment, generate_payment_reference
 from .serializers import (
     ListingSerializer,
     BookingSerializer,
@@ -20,15 +25,29 @@ from .serializers import (
     PaymentInitiateSerializer,
     PaymentVerifySerializer
 )
-from .tasks import send_booking_confirmation_email
+from .pagination import ListingCursorPagination
+from .chapa import (
+    CHAPA_BREAKER_RESET_TIMEOUT,
+    CHAPA_VERIFY_URL,
+    chapa_call,
+    chapa_is_down
+)
+from .tasks import initiate_chapa_payment, queue_booking_confirmation_emails
 
 logger = logging.getLogger(__name__)
 
+# Shape of references produced by generate_payment_reference()
+_REFERENCE_RE = re.compile(r'TRV-[0-9A-F]{12}')
+
+# A payment still pending after this long is assumed to have lost its task
+PENDING_PAYMENT_REQUEUE_AFTER = timedelta(minutes=5)
+
 
 class ListingViewSet(viewsets.ModelViewSet):
     """ViewSet for Listing model"""
     queryset = Listing.objects.filter(available=True)
     serializer_class = ListingSerializer
+    pagination_class = ListingCursorPagination
     permission_classes = [AllowAny]
 
     def get_queryset(self):
@@ -52,6 +71,21 @@ class ListingViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        List listings, caching each distinct query string for 5 minutes
+        
+        The key embeds a version number bumped whenever a listing is saved
+        or deleted, so stale pages are never served after a change.
+        """
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        key = f"listings:{Listing.list_cache_version()}:{query}"
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, 300)
+        return Response(data)
+
 
 class BookingViewSet(viewsets.ModelViewSet):
     """ViewSet for Booking model"""
@@ -60,7 +94,9 @@ class BookingViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return bookings for the current user"""
-        return Booking.objects.filter(user=self.request.user)
+        return Booking.objects.select_related('user', 'listing').filter(
+            user=self.request.user
+        )
 
     def perform_create(self, serializer):
         """Create booking and initiate payment"""
@@ -70,6 +106,34 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking.calculate_total_price()
         booking.save()
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create many bookings for the current user in one request
+        
+        Expects a JSON list of booking payloads. Rows are inserted in
+        batches and each confirmation email is queued as its own task over
+        one pooled producer, so a failed send is retried on its own.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        bookings = []
+        for data in serializer.validated_data:
+            booking = Booking(**{**data, 'user': request.user})
+            booking.calculate_total_price()
+            bookings.append(booking)
+        Booking.objects.bulk_create(bookings, batch_size=500)
+
+        queue_booking_confirmation_emails(
+            [booking.id for booking in bookings]
+        )
+
+        return Response(
+            self.get_serializer(bookings, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -77,6 +141,10 @@ def initiate_payment(request):
     """
     Initiate payment with Chapa API
     
+    Creates a pending Payment and queues the Chapa call on a Celery worker,
+    responding with 202 Accepted straight away. Clients poll ``status_url``
+    until the payment reaches 'processing' and carries a checkout_url.
+    
     Expected payload:
     {
         "booking_id": "uuid-of-booking",
@@ -99,124 +167,98 @@ def initiate_payment(request):
     last_name = serializer.validated_data['last_name']
     phone_number = serializer.validated_data.get('phone_number', '')
 
-    # Get booking
-    try:
-        booking = Booking.objects.get(
-            booking_id=booking_id,
-            user=request.user
-        )
-    except Booking.DoesNotExist:
+    # Fail fast while the payment gateway is known to be down
+    if chapa_is_down():
         return Response(
-            {"error": "Booking not found"},
-            status=status.HTTP_404_NOT_FOUND
+            {"error": "Payment gateway temporarily unavailable"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(CHAPA_BREAKER_RESET_TIMEOUT)}
         )
 
-    # Check if payment already exists
-    if hasattr(booking, 'payment'):
-        if booking.payment.status in ['completed', 'processing']:
+    with transaction.atomic():
+        # Lock the booking row so concurrent requests for the same booking
+        # take turns deciding whether a Chapa call is needed
+        try:
+            booking = Booking.objects.select_for_update(
+                of=('self',)
+            ).select_related(
+                'payment', 'listing'
+            ).defer('payment__raw_response').get(
+                booking_id=booking_id,
+                user=request.user
+            )
+        except Booking.DoesNotExist:
             return Response(
-                {"error": "Payment already initiated or completed"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"error": "Booking not found"},
+                status=status.HTTP_404_NOT_FOUND
             )
 
-    # Generate unique reference
-    reference = f"TRV-{uuid.uuid4().hex[:12].upper()}"
-
-    # Create Payment record
-    payment = Payment.objects.create(
-        booking=booking,
-        reference=reference,
-        amount=booking.total_price,
-        currency='ETB',
-        status='pending'
-    )
-
-    # Prepare Chapa API request
-    chapa_url = f"{settings.CHAPA_BASE_URL}/transaction/initialize"
-    
-    payload = {
-        "amount": str(booking.total_price),
-        "currency": "ETB",
-        "email": email,
-        "first_name": first_name,
-        "last_name": last_name,
-        "phone_number": phone_number,
-        "tx_ref": reference,
-        "callback_url": f"{settings.CHAPA_CALLBACK_URL}?reference={reference}",
-        "return_url": f"{settings.CHAPA_CALLBACK_URL}?reference={reference}",
-        "customization": {
-            "title": f"Booking Payment - {booking.listing.title}",
-            "description": f"Payment for booking {booking.booking_id}"
-        }
-    }
-
-    headers = {
-        "Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    try:
-        # Make request to Chapa API
-        response = requests.post(chapa_url, json=payload, headers=headers, timeout=30)
-        response_data = response.json()
-
-        logger.info(f"Chapa API Response: {response_data}")
-
-        if response.status_code == 200 and response_data.get('status') == 'success':
-            # Update payment with Chapa response
-            payment.checkout_url = response_data['data']['checkout_url']
-            payment.chapa_reference = response_data['data'].get('tx_ref', reference)
-            payment.status = 'processing'
-            payment.raw_response = response_data
-            payment.save()
-
-            return Response({
-                "status": "success",
-                "message": "Payment initiated successfully",
-                "data": {
-                    "payment_id": str(payment.payment_id),
-                    "reference": payment.reference,
-                    "checkout_url": payment.checkout_url,
-                    "amount": str(payment.amount),
-                    "currency": payment.currency
+        # Booking.payment is one-to-one, so the database also rejects a
+        # second row should anything create one outside this lock
+        payment = getattr(booking, 'payment', None)
+        needs_initiation = False
+        if payment is None:
+            payment, needs_initiation = Payment.objects.get_or_create(
+                booking=booking,
+                defaults={
+                    'amount': booking.total_price,
+                    'currency': 'ETB',
+                    'status': 'pending'
                 }
-            }, status=status.HTTP_200_OK)
-        else:
-            # Payment initiation failed
-            error_message = response_data.get('message', 'Payment initiation failed')
-            payment.mark_as_failed(error_message)
-            
-            logger.error(f"Chapa API Error: {response_data}")
-            
-            return Response({
-                "status": "error",
-                "message": error_message,
-                "data": response_data
-            }, status=status.HTTP_400_BAD_REQUEST)
+            )
 
-    except requests.exceptions.RequestException as e:
-        # Network or request error
-        error_message = f"Failed to connect to payment gateway: {str(e)}"
-        payment.mark_as_failed(error_message)
-        
-        logger.error(f"Payment initiation error: {str(e)}")
-        
-        return Response({
-            "status": "error",
-            "message": error_message
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if payment.status in ['completed', 'processing']:
+            return Response(
+                {"error": "Payment already initiated or completed"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-    except Exception as e:
-        # Unexpected error
-        error_message = f"Unexpected error: {str(e)}"
-        payment.mark_as_failed(error_message)
-        
-        logger.error(f"Unexpected payment error: {str(e)}")
-        
-        return Response({
-            "status": "error",
-            "message": "An unexpected error occurred"
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if payment.status == 'pending' and not needs_initiation and (
+            payment.updated_at < timezone.now() - PENDING_PAYMENT_REQUEUE_AFTER
+        ):
+            # The task behind this pending payment was never published or
+            # got lost; queue another one. It skips non-pending payments, and
+            # touching updated_at stops later calls queueing yet another.
+            payment.apply_update()
+            needs_initiation = True
+
+        if payment.status in ['failed', 'cancelled']:
+            # Start a fresh attempt on the same row under a new Chapa reference
+            payment.apply_update(
+                reference=generate_payment_reference(),
+                amount=booking.total_price,
+                status='pending',
+                error_message=None,
+                checkout_url=None
+            )
+            needs_initiation = True
+
+        # Hand the Chapa call to a worker once the payment row is committed,
+        # so this request returns immediately. A recently updated pending
+        # payment already has its task queued.
+        if needs_initiation:
+            transaction.on_commit(partial(
+                initiate_chapa_payment.delay,
+                payment_id=str(payment.payment_id),
+                email=email,
+                first_name=first_name,
+                last_name=last_name,
+                phone_number=phone_number
+            ))
+
+    return Response({
+        "status": "accepted",
+        "message": "Payment initiation in progress",
+        "data": {
+            "payment_id": str(payment.payment_id),
+            "reference": payment.reference,
+            "amount": str(payment.amount),
+            "currency": payment.currency,
+            "status_url": request.build_absolute_uri(
+                reverse('payment-status', args=[payment.payment_id])
+            )
+        }
+    }, status=status.HTTP_202_ACCEPTED)
 
 
 @api_view(['GET', 'POST'])
@@ -236,9 +278,45 @@ def verify_payment(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # Reject malformed references without touching the database
+    if not _REFERENCE_RE.fullmatch(reference):
+        return Response(
+            {"error": "Invalid reference format"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Chapa may call back several times for one reference. A final outcome
+    # is answered from cache. Otherwise one call at a time claims the
+    # verification; a replay arriving meanwhile is told it is in progress
+    # rather than calling Chapa (and queueing an email) again. The claim
+    # expires after 60 s in case its holder dies.
+    result_key = f"chapa:result:{reference}"
+    claim_key = f"chapa:verified:{reference}"
+    cached = cache.get(result_key)
+    if cached is None and not cache.add(claim_key, '1', 60):
+        cached = cache.get(result_key)
+        if cached is None:
+            return Response({
+                "status": "processing",
+                "message": "Payment verification already in progress"
+            }, status=status.HTTP_202_ACCEPTED)
+    if cached is not None:
+        body, http_status = cached
+        return Response(body, status=http_status)
+
+    try:
+        return _verify_with_chapa(request, reference, result_key)
+    finally:
+        cache.delete(claim_key)
+
+
+def _verify_with_chapa(request, reference, result_key):
+    """Verify a claimed reference with Chapa and update its payment"""
     # Get payment record
     try:
-        payment = Payment.objects.get(reference=reference)
+        payment = Payment.objects.select_related(
+            'booking__user', 'booking__listing'
+        ).get(reference=reference)
     except Payment.DoesNotExist:
         return Response(
             {"error": "Payment not found"},
@@ -254,87 +332,101 @@ def verify_payment(request):
         }, status=status.HTTP_200_OK)
 
     # Verify with Chapa API
-    chapa_url = f"{settings.CHAPA_BASE_URL}/transaction/verify/{reference}"
-    
-    headers = {
-        "Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}",
-    }
-
     try:
         # Make verification request
-        response = requests.get(chapa_url, headers=headers, timeout=30)
-        response_data = response.json()
+        status_code, response_data, error = chapa_call(
+            'GET', CHAPA_VERIFY_URL.format(reference)
+        )
+
+        if isinstance(error, pybreaker.CircuitBreakerError):
+            logger.warning(
+                "Chapa circuit open, verification of %s deferred", reference
+            )
+
+            return Response({
+                "status": "error",
+                "message": "Payment gateway temporarily unavailable"
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(CHAPA_BREAKER_RESET_TIMEOUT)})
+
+        if error is not None:
+            logger.error("Payment verification error: %s", error)
+
+            return Response({
+                "status": "error",
+                "message": f"Failed to verify payment: {str(error)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        logger.info(f"Chapa Verification Response: {response_data}")
+        logger.info("Chapa Verification Response: %s", response_data)
 
-        if response.status_code == 200 and response_data.get('status') == 'success':
+        if status_code == 200 and response_data.get('status') == 'success':
             transaction_data = response_data.get('data', {})
             transaction_status = transaction_data.get('status')
 
-            # Update payment based on transaction status
+            # Update payment based on transaction status. The instance is
+            # updated in memory too, so it is serialized once without a refetch.
             if transaction_status == 'success':
-                transaction_id = transaction_data.get('reference')
-                payment.mark_as_completed(transaction_id=transaction_id)
-                payment.payment_method = transaction_data.get('method', '')
-                payment.raw_response = response_data
-                payment.save()
+                payment.mark_as_completed(
+                    transaction_id=transaction_data.get('reference'),
+                    payment_method=transaction_data.get('method', ''),
+                    raw_response=response_data
+                )
 
                 # Send confirmation email asynchronously
-                send_booking_confirmation_email.delay(
-                    booking_id=str(payment.booking.booking_id),
-                    user_email=payment.booking.user.email
-                )
+                queue_booking_confirmation_emails([payment.booking_id])
 
-                return Response({
-                    "status": "success",
-                    "message": "Payment verified and completed successfully",
-                    "data": PaymentSerializer(payment).data
-                }, status=status.HTTP_200_OK)
+                result_status = "success"
+                message = "Payment verified and completed successfully"
+                http_status = status.HTTP_200_OK
             
             elif transaction_status == 'failed':
-                payment.mark_as_failed("Payment failed at gateway")
-                payment.raw_response = response_data
-                payment.save()
-
-                return Response({
-                    "status": "failed",
-                    "message": "Payment verification failed",
-                    "data": PaymentSerializer(payment).data
-                }, status=status.HTTP_400_BAD_REQUEST)
+                payment.mark_as_failed(
+                    "Payment failed at gateway",
+                    raw_response=response_data
+                )
+
+                result_status = "failed"
+                message = "Payment verification failed"
+                http_status = status.HTTP_400_BAD_REQUEST
             
             else:
                 # Payment still pending or processing
-                payment.status = 'processing'
-                payment.raw_response = response_data
-                payment.save()
+                payment.apply_update(
+                    status='processing',
+                    raw_response=response_data
+                )
+
+                result_status = "processing"
+                message = "Payment is still being processed"
+                http_status = status.HTTP_200_OK
+
+            body = {
+                "status": result_status,
+                "message": message,
+                "data": PaymentSerializer(
+                    payment, context={'request': request}
+                ).data
+            }
 
-                return Response({
-                    "status": "processing",
-                    "message": "Payment is still being processed",
-                    "data": PaymentSerializer(payment).data
-                }, status=status.HTTP_200_OK)
+            # Completed and failed payments are final; remember the outcome
+            # so webhook replays are answered without calling Chapa again
+            if result_status in ["success", "failed"]:
+                cache.set(result_key, (body, http_status), 300)
+
+            return Response(body, status=http_status)
 
         else:
             error_message = response_data.get('message', 'Verification failed')
-            logger.error(f"Chapa Verification Error: {response_data}")
+            logger.error("Chapa Verification Error: %s", response_data)
             
             return Response({
                 "status": "error",
                 "message": error_message
             }, status=status.HTTP_400_BAD_REQUEST)
 
-    except requests.exceptions.RequestException as e:
-        error_message = f"Failed to verify payment: {str(e)}"
-        logger.error(f"Payment verification error: {str(e)}")
-        
-        return Response({
-            "status": "error",
-            "message": error_message
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
     except Exception as e:
         error_message = f"Unexpected error: {str(e)}"
-        logger.error(f"Unexpected verification error: {str(e)}")
+        logger.error("Unexpected verification error: %s", e)
         
         return Response({
             "status": "error",
@@ -345,24 +437,24 @@ def verify_payment(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def payment_status(request, payment_id):
-    """Get payment status by payment ID"""
-    try:
-        payment = Payment.objects.get(payment_id=payment_id)
-        
-        # Check if user owns this payment's booking
-        if payment.booking.user != request.user:
-            return Response(
-                {"error": "Unauthorized access"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        return Response({
-            "status": "success",
-            "data": PaymentSerializer(payment).data
-        }, status=status.HTTP_200_OK)
+    """
+    Get payment status by payment ID
+    
+    Ownership is part of the query, so payments belonging to other users
+    are reported as not found rather than forbidden.
+    """
+    payment = Payment.objects.select_related('booking__user').filter(
+        payment_id=payment_id,
+        booking__user=request.user
+    ).first()
 
-    except Payment.DoesNotExist:
+    if payment is None:
         return Response(
             {"error": "Payment not found"},
             status=status.HTTP_404_NOT_FOUND
         )
+
+    return Response({
+        "status": "success",
+        "data": PaymentSerializer(payment).data
+    }, status=status.HTTP_200_OK)
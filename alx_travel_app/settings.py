@@ -11,10 +11,20 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import queue
+
+import environ
+import orjson
+from kombu import Queue
+from kombu.serialization import register
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Values such as the Chapa credentials come from the environment or .env
+env = environ.Env()
+environ.Env.read_env(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -78,6 +88,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -118,7 +130,111 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
+
+# Chapa
+# https://developer.chapa.co/
+
+CHAPA_SECRET_KEY = env('CHAPA_SECRET_KEY', default='')
+CHAPA_BASE_URL = env('CHAPA_BASE_URL', default='https://api.chapa.co/v1')
+CHAPA_CALLBACK_URL = env(
+    'CHAPA_CALLBACK_URL',
+    default='http://localhost:8000/api/payments/verify/'
+)
+
+# Redis database holding the Chapa circuit breaker state shared by all
+# web and worker processes.
+CHAPA_BREAKER_REDIS_URL = 'redis://localhost:6379/2'
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+# Request threads only enqueue log records; ListingsConfig.ready() starts a
+# QueueListener that drains LOG_QUEUE into LOG_FILE on a background thread.
+# Forked children (Celery prefork, gunicorn --preload) get their own queue
+# and listener; see ListingsConfig.restart_log_listener().
+LOG_QUEUE = queue.Queue(-1)
+LOG_FILE = '/tmp/alx_travel_app.log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'queue': {
+            'class': 'logging.handlers.QueueHandler',
+            'queue': LOG_QUEUE,
+        },
+    },
+    'loggers': {
+        'listings': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Django REST Framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'drf_orjson_renderer.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'drf_orjson_renderer.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+
+# Celery
+# https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+
+register(
+    'orjson',
+    orjson.dumps,
+    orjson.loads,
+    content_type='application/x-orjson',
+    content_encoding='utf-8',
+)
+
+CELERY_BROKER_URL = 'redis://localhost:6379/0'
+CELERY_TASK_SERIALIZER = 'orjson'
+CELERY_RESULT_SERIALIZER = 'orjson'
+CELERY_ACCEPT_CONTENT = ['orjson', 'json']
+
+# Booking emails are cheap to lose and expensive to persist, so they use a
+# non-durable queue; everything else stays on the durable default queue.
+CELERY_TASK_DEFAULT_QUEUE = 'celery'
+CELERY_TASK_QUEUES = (
+    Queue('celery', routing_key='celery'),
+    Queue('emails', routing_key='emails', durable=False),
+)
+CELERY_TASK_ROUTES = {
+    'listings.tasks.send_booking_confirmation_email': {'queue': 'emails'},
+}
+
+# Email tasks vary widely in latency (SMTP), so workers reserve one message
+# at a time and only ack once the task has finished.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True